@@ -306,11 +306,16 @@ class MonitorConsumer:
         try:
             for message in self.kafka_consumer:
                 try:
-                    self.process_message(message.value)
+                    # city-simulator packs several gateway payloads into one batch message
+                    value = message.value
+                    gateway_messages = value['gateways'] if 'gateways' in value else [value]
                     
-                    # Log statistics every 50 messages
-                    if self.messages_processed % 50 == 0:
-                        self.log_statistics()
+                    for gateway_message in gateway_messages:
+                        self.process_message(gateway_message)
+                        
+                        # Log statistics every 50 messages
+                        if self.messages_processed % 50 == 0:
+                            self.log_statistics()
                         
                 except Exception as e:
                     logger.error(f"Error processing message: {e}")
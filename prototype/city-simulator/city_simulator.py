@@ -31,12 +31,16 @@ Example with 3 instances, 5 gateways each (15 total gateways):
 
 import json
 import logging
+import math
 import os
-import random
+import queue
 import sys
 import threading
-import time
-from typing import Any, Dict, List, Tuple
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
 
 # Add parent directory to path to import common module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -45,6 +49,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from common.kafka_utils import create_kafka_producer
 # Import our modular components
 from edge_manager import EdgeManager
+from gateway_scheduler import GatewayScheduler
+from sensor_simulator import SensorArray
 
 # Initial logging configuration (will be updated from config)
 logging.basicConfig(
@@ -53,6 +59,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def start_log_queue() -> QueueListener:
+    """
+    Move log output off the gateway scheduler thread.
+    
+    Replaces the root handlers with a QueueHandler and starts a QueueListener
+    that writes the records to the original handlers from a background
+    thread, so logging never blocks on the stream handler's lock or stdout.
+    
+    Returns:
+        The started QueueListener (stop it on shutdown to flush pending records)
+    """
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
 # Environment variables for configuration
 KAFKA_BOOTSTRAP_SERVERS = os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092')
 KAFKA_TOPICS = {
@@ -63,10 +89,23 @@ CITY_CONFIG_FILE = os.getenv('CITY_CONFIG_FILE',
 CITY_GRAPH_FILE = os.getenv('CITY_GRAPH_FILE',
                              os.path.join(os.path.dirname(__file__), 'config', 'laquila-city-graph-overture.json'))
 
+# Kafka producer batching (throughput-oriented gateway fan-out)
+KAFKA_LINGER_MS = int(os.getenv('KAFKA_LINGER_MS', '30'))
+KAFKA_BATCH_SIZE = int(os.getenv('KAFKA_BATCH_SIZE', '400000'))
+
+# Application-level batching: gateway payloads packed into one Kafka message
+GATEWAY_BATCH_MAX = int(os.getenv('GATEWAY_BATCH_MAX', '100'))
+# Encoded payload bytes per message, kept below the producer's max_request_size (1 MB default)
+GATEWAY_BATCH_MAX_BYTES = int(os.getenv('GATEWAY_BATCH_MAX_BYTES', '900000'))
+GATEWAY_BATCH_WINDOW_MS = int(os.getenv('GATEWAY_BATCH_WINDOW_MS', '50'))
+
 # Horizontal scaling configuration
 INSTANCE_ID = int(os.getenv('INSTANCE_ID', '0'))
 TOTAL_INSTANCES = int(os.getenv('TOTAL_INSTANCES', '1'))
 
+# Fallback (latitude, longitude) for districts without a configured center
+DEFAULT_DISTRICT_CENTER = (42.35, 13.40)
+
 # Global graph data cache
 _GRAPH_DATA = None
 _EDGE_COORDS_MAP = None
@@ -145,6 +184,10 @@ def load_city_config() -> Dict[str, Any]:
     try:
         with open(CITY_CONFIG_FILE, 'r', encoding='utf-8') as f:
             config = json.load(f)
+        # District IDs are repeated in every gateway payload: share one string object
+        for district in config.get('districts', []):
+            if 'district_id' in district:
+                district['district_id'] = sys.intern(district['district_id'])
         logger.info(f"✓ Loaded city configuration: {config['city']['name']}")
         return config
     except FileNotFoundError:
@@ -156,33 +199,77 @@ def load_city_config() -> Dict[str, Any]:
 
 
 def generate_edge_id(index: int) -> str:
-    """Generate city graph edge ID in format E-XXXXX."""
-    return f"E-{index:05d}"
+    """Generate city graph edge ID in format E-XXXXX (interned, as it is repeated in every reading)."""
+    return sys.intern(f"E-{index:05d}")
 
 
 def generate_gateway_id(gateway_index: int) -> str:
-    """Generate gateway ID in format GW-XXXXX."""
-    return f"GW-{gateway_index:05d}"
+    """Generate gateway ID in format GW-XXXXX (interned, as it is repeated in every reading)."""
+    return sys.intern(f"GW-{gateway_index:05d}")
+
+
+def get_district_center(district: Dict) -> Tuple[float, float]:
+    """Extract a district's center as (latitude, longitude), or the default center if not set."""
+    center = district.get('center')
+    return (center['latitude'], center['longitude']) if center else DEFAULT_DISTRICT_CENTER
+
 
+def make_district_entry(district: Dict) -> Tuple[Dict, Tuple[float, float]]:
+    """Pair a district with its center, extracted once, for use as a lookup entry."""
+    return district, get_district_center(district)
 
-def find_district_for_edge(districts: List[Dict], edge_index: int) -> Dict:
+
+def build_district_lookup(districts: List[Dict]) -> List[Optional[Tuple[Dict, Tuple[float, float]]]]:
     """
-    Find which district an edge belongs to based on edge ranges.
+    Precompute a table mapping edge index -> (district, center) entry.
+    
+    Districts own contiguous edge ranges, so one pass over the ranges gives
+    O(1) lookups afterwards instead of scanning all districts per edge.
+    Each district's center is extracted once and shared by all its edges.
     
     Args:
         districts: List of district configurations with edge_range
-        edge_index: Edge index (0-3458)
         
     Returns:
-        District configuration dict, or first district as fallback
+        List indexed by edge index; entries not covered by any district are None
     """
+    ranges = []
     for district in districts:
         edge_range = district.get('edge_range', {})
-        start = edge_range.get('start', 0)
-        end = edge_range.get('end', 0)
-        if start <= edge_index <= end:
-            return district
-    return districts[0] if districts else None
+        ranges.append((max(edge_range.get('start', 0), 0), edge_range.get('end', 0),
+                       make_district_entry(district)))
+    
+    size = max((end + 1 for _, end, _ in ranges), default=0)
+    lookup = [None] * size
+    
+    # Fill in reverse so that, on overlapping ranges, the first district listed wins
+    for start, end, entry in reversed(ranges):
+        lookup[start:end + 1] = [entry] * max(end - start + 1, 0)
+    
+    return lookup
+
+
+def find_district_for_edge(
+    district_lookup: List[Optional[Tuple[Dict, Tuple[float, float]]]],
+    edge_index: int,
+    default: Optional[Tuple[Dict, Tuple[float, float]]] = None
+) -> Optional[Tuple[Dict, Tuple[float, float]]]:
+    """
+    Find which district an edge belongs to based on edge ranges.
+    
+    Args:
+        district_lookup: Table built by build_district_lookup()
+        edge_index: Edge index (0-3458)
+        default: Entry to return when no range covers the edge
+        
+    Returns:
+        (district configuration dict, center) entry, or default as fallback
+    """
+    if 0 <= edge_index < len(district_lookup):
+        entry = district_lookup[edge_index]
+        if entry is not None:
+            return entry
+    return default
 
 
 def calculate_gateway_edge_range(
@@ -223,8 +310,10 @@ def generate_sensors_for_gateway(
     sensors_per_edge: Dict[str, int],
     gateway_location: Dict[str, float],
     weather_stations_count: int = 3,
-    edge_coords_map: Dict[str, Dict[str, float]] = None
-) -> Dict[str, List[Dict]]:
+    edge_coords_map: Dict[str, Dict[str, float]] = None,
+    rng: Optional[np.random.Generator] = None,
+    edge_ids: Optional[List[str]] = None
+) -> Dict[str, SensorArray]:
     """
     Generate sensor configurations for a gateway covering multiple edges.
     
@@ -240,12 +329,46 @@ def generate_sensors_for_gateway(
         gateway_location: Gateway's base location for calculating sensor positions
         weather_stations_count: Fixed number of weather stations per gateway
         edge_coords_map: Pre-built map of edge_id -> {latitude, longitude}
+        rng: Random generator for sensor offsets (unseeded if not given)
+        edge_ids: Precomputed edge IDs indexed by edge index (generated if not given)
         
     Returns:
-        Dict mapping sensor types to list of sensor configs with edge_id
+        Dict mapping sensor types to a SensorArray (one column per field)
     """
-    sensors = {'speed': [], 'weather': [], 'camera': []}
+    if rng is None:
+        rng = np.random.default_rng()
+    if edge_ids is None:
+        edge_ids = [generate_edge_id(i) for i in range(edge_end + 1)]
+    
+    # Column lists per sensor type, turned into SensorArrays at the end
+    columns = {
+        sensor_type: {'ids': [], 'edge_ids': [], 'locations': [], 'offsets': [], 'base_locations': []}
+        for sensor_type in ('speed', 'weather', 'camera')
+    }
+    
+    # Append one sensor's fields to the columns of its type
+    def add_sensor(sensor_type, sensor_id, edge_id, location, offset_lat, offset_lon, edge_coords):
+        column = columns[sensor_type]
+        column['ids'].append(sensor_id)
+        column['edge_ids'].append(edge_id)  # Each sensor knows which graph edge it monitors
+        column['locations'].append(location)
+        column['offsets'].append((round(offset_lat, 6), round(offset_lon, 6)))
+        # Store actual edge location if available
+        column['base_locations'].append(
+            (edge_coords['latitude'], edge_coords['longitude']) if edge_coords else (math.nan, math.nan)
+        )
+    
     total_edges = edge_end - edge_start + 1
+    other_sensor_types = [
+        (sensor_type, count) for sensor_type, count in sensors_per_edge.items()
+        if sensor_type != 'weather'  # Weather handled separately below
+    ]
+    
+    # Pre-draw all random offsets in one shot as uniform(-1, 1) values,
+    # scaled below to the range each positioning rule needs
+    weather_jitter = rng.uniform(-1, 1, (max(weather_stations_count, 0), 2)).tolist()
+    sensors_per_edge_total = sum(count for _, count in other_sensor_types)
+    sensor_jitter = rng.uniform(-1, 1, (total_edges, sensors_per_edge_total, 2)).tolist()
     
     # Generate weather stations (limited number, spread across gateway's edge range)
     if weather_stations_count > 0:
@@ -254,7 +377,7 @@ def generate_sensors_for_gateway(
         for i in range(weather_stations_count):
             # Pick edges spread across the range
             weather_edge_index = edge_start + min(i * weather_edge_step, total_edges - 1)
-            weather_edge_id = generate_edge_id(weather_edge_index)
+            weather_edge_id = edge_ids[weather_edge_index]
             sensor_id = f"weather-{gateway_id}-{chr(97 + i)}"
             
             # Get coordinates from map if available, otherwise use offset
@@ -267,31 +390,23 @@ def generate_sensors_for_gateway(
             else:
                 # Fallback to offset-based positioning
                 offset_factor = i / max(1, weather_stations_count - 1) if weather_stations_count > 1 else 0.5
-                offset_lat = (offset_factor * 0.02 - 0.01) + random.uniform(-0.002, 0.002)
-                offset_lon = (offset_factor * 0.02 - 0.01) + random.uniform(-0.002, 0.002)
+                jitter_lat, jitter_lon = weather_jitter[i]
+                offset_lat = (offset_factor * 0.02 - 0.01) + jitter_lat * 0.002
+                offset_lon = (offset_factor * 0.02 - 0.01) + jitter_lon * 0.002
             
-            sensors['weather'].append({
-                'sensor_id': sensor_id,
-                'edge_id': weather_edge_id,
-                'location': f"Weather station {i+1} near {weather_edge_id}",
-                'offset_lat': round(offset_lat, 6),
-                'offset_lon': round(offset_lon, 6),
-                'base_location': edge_coords  # Store actual edge location if available
-            })
+            add_sensor('weather', sensor_id, weather_edge_id,
+                       f"Weather station {i+1} near {weather_edge_id}",
+                       offset_lat, offset_lon, edge_coords)
     
     # Generate other sensors per edge (speed, camera, etc.)
-    for edge_index in range(edge_start, edge_end + 1):
-        edge_id = generate_edge_id(edge_index)
-        
+    for edge_index, edge_id in enumerate(edge_ids[edge_start:edge_end + 1], start=edge_start):
         # Get actual coordinates for this edge from the map (O(1) lookup)
         edge_coords = get_edge_coordinates(edge_id, edge_coords_map) if edge_coords_map else None
+        edge_jitter = iter(sensor_jitter[edge_index - edge_start])
         
-        for sensor_type, count in sensors_per_edge.items():
-            # Skip weather - already handled above
-            if sensor_type == 'weather':
-                continue
-                
+        for sensor_type, count in other_sensor_types:
             for i in range(count):
+                jitter_lat, jitter_lon = next(edge_jitter)
                 sensor_id = f"{sensor_type}-{edge_id}-{chr(97 + i)}"
                 
                 # For cameras: MANDATORY to use exact edge coordinates
@@ -302,24 +417,74 @@ def generate_sensors_for_gateway(
                     offset_lon = 0.0
                 elif edge_coords:
                     # Use edge coordinates with small random offset for multiple sensors
-                    offset_lat = random.uniform(-0.0001, 0.0001)
-                    offset_lon = random.uniform(-0.0001, 0.0001)
+                    offset_lat = jitter_lat * 0.0001
+                    offset_lon = jitter_lon * 0.0001
                 else:
                     # Fallback to calculated offset from gateway location
                     edge_offset = (edge_index - edge_start) / max(1, edge_end - edge_start)
-                    offset_lat = random.uniform(-0.01, 0.01) + (edge_offset * 0.02 - 0.01)
-                    offset_lon = random.uniform(-0.01, 0.01) + (edge_offset * 0.02 - 0.01)
+                    offset_lat = jitter_lat * 0.01 + (edge_offset * 0.02 - 0.01)
+                    offset_lon = jitter_lon * 0.01 + (edge_offset * 0.02 - 0.01)
                 
-                sensors[sensor_type].append({
-                    'sensor_id': sensor_id,
-                    'edge_id': edge_id,  # Each sensor knows which graph edge it monitors
-                    'location': f"{sensor_type.capitalize()} on {edge_id}",
-                    'offset_lat': round(offset_lat, 6),
-                    'offset_lon': round(offset_lon, 6),
-                    'base_location': edge_coords  # Store actual edge location if available
-                })
+                add_sensor(sensor_type, sensor_id, edge_id,
+                           f"{sensor_type.capitalize()} on {edge_id}",
+                           offset_lat, offset_lon, edge_coords)
+    
+    return {
+        sensor_type: SensorArray(**column, gateway_location=gateway_location)
+        for sensor_type, column in columns.items()
+    }
+
+
+def build_gateway_config(
+    gateway_id: str,
+    edge_start: int,
+    edge_end: int,
+    location: Dict[str, float],
+    weather_stations_count: int,
+    seed: np.random.SeedSequence,
+    sensors_per_edge: Dict[str, int],
+    edge_coords_map: Dict[str, Dict[str, float]],
+    edge_ids: List[str]
+) -> Dict[str, Any]:
+    """
+    Build the configuration of one gateway, including all its sensors.
+    
+    Pure function of its arguments (no shared state): the sensor layout
+    depends only on the gateway's own seed.
+    
+    Args:
+        gateway_id: The gateway ID (GW-XXXXX)
+        edge_start: First edge index this gateway covers
+        edge_end: Last edge index this gateway covers (inclusive)
+        location: Gateway location (latitude/longitude)
+        weather_stations_count: Number of weather stations for this gateway
+        seed: Seed for this gateway's sensor offsets
+        sensors_per_edge: Dict with sensor count per type per edge
+        edge_coords_map: Pre-built map of edge_id -> {latitude, longitude}
+        edge_ids: Precomputed edge IDs indexed by edge index
+        
+    Returns:
+        Gateway configuration dict as expected by EdgeManager
+    """
+    sensors = generate_sensors_for_gateway(
+        gateway_id,
+        edge_start,
+        edge_end,
+        sensors_per_edge,
+        location,
+        weather_stations_count,
+        edge_coords_map,
+        np.random.default_rng(seed),
+        edge_ids
+    )
     
-    return sensors
+    return {
+        'gateway_id': gateway_id,
+        'name': f"Gateway {gateway_id} ({edge_end - edge_start + 1} edges)",
+        'location': location,
+        'sensors': sensors,
+        'edge_range': {'start': edge_start, 'end': edge_end}
+    }
 
 
 class CitySimulator:
@@ -364,6 +529,11 @@ class CitySimulator:
         log_level = logging_config.get('level', 'INFO')
         logging.getLogger().setLevel(getattr(logging, log_level, logging.INFO))
         
+        # Precompute edge -> district table (first district is the fallback)
+        districts = self.city_config.get('districts', [])
+        self._district_for_edge = build_district_lookup(districts)
+        self._default_district = make_district_entry(districts[0]) if districts else None
+        
         # Calculate totals
         self.total_edges = self.graph_config.get('total_edges', 3459)
         self.total_gateways = self.gateways_per_instance * TOTAL_INSTANCES
@@ -372,13 +542,20 @@ class CitySimulator:
         self.gateway_start = INSTANCE_ID * self.gateways_per_instance
         self.gateway_end = self.gateway_start + self.gateways_per_instance - 1
         
+        # Precompute all ID strings once (edge IDs by edge index, gateway IDs by local index)
+        self._edge_ids = [generate_edge_id(i) for i in range(self.total_edges)]
+        self._gateway_ids = [generate_gateway_id(i) for i in range(self.gateway_start, self.gateway_end + 1)]
+        
+        # One random generator for the whole instance, seeded for reproducible runs
+        self._rng = np.random.default_rng(seed=INSTANCE_ID)
+        
         # Initialize Kafka
         self.kafka_producer = self._init_kafka_producer()
         
         # Threading
         self.stop_event = threading.Event()
         self.gateways = []
-        self.gateway_threads = []
+        self.scheduler_thread = None
         
         # Initialize gateways
         self._initialize_gateways()
@@ -390,11 +567,26 @@ class CitySimulator:
         logger.info(f"  Edges per gateway: ~{self.total_edges // self.total_gateways}")
     
     def _init_kafka_producer(self):
-        """Initialize Kafka producer."""
+        """
+        Initialize Kafka producer.
+        
+        The producer is shared by every gateway of this instance, so it is
+        tuned for throughput: sends are fire-and-forget and the producer's
+        I/O thread coalesces them into large compressed batches. Payloads
+        are serialized with orjson, which encodes straight to bytes; keys
+        are passed pre-encoded, so no key serializer is configured.
+        """
         producer = create_kafka_producer(
             bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
             max_retries=10,
-            retry_delay=5
+            retry_delay=5,
+            value_serializer=orjson.dumps,
+            key_serializer=None,
+            linger_ms=KAFKA_LINGER_MS,
+            batch_size=KAFKA_BATCH_SIZE,
+            compression_type='lz4',
+            acks=0,
+            max_in_flight_requests_per_connection=5
         )
         logger.info(f"✓ Kafka producer ready (topics: {list(KAFKA_TOPICS.values())})")
         return producer
@@ -406,16 +598,21 @@ class CitySimulator:
         Each gateway manages sensors across a range of city graph edges.
         Weather stations are distributed across all gateways based on total_weather_stations.
         """
-        districts = self.city_config.get('districts', [])
-        
         # Calculate weather stations distribution across all gateways in the city
         # Each gateway gets a share based on its global index
         weather_stations_per_gateway = self.total_weather_stations // self.total_gateways
         weather_stations_remainder = self.total_weather_stations % self.total_gateways
         
+        # Gateway location offsets from their district centers, drawn in one shot
+        location_offsets = self._rng.uniform(-0.005, 0.005, (self.gateways_per_instance, 2)).tolist()
+        
+        # One independent seed per gateway, so each sensor layout is
+        # reproducible on its own
+        gateway_seeds = np.random.SeedSequence(INSTANCE_ID).spawn(self.gateways_per_instance)
+        
         for local_idx in range(self.gateways_per_instance):
             gateway_global_idx = self.gateway_start + local_idx
-            gateway_id = generate_gateway_id(gateway_global_idx)
+            gateway_id = self._gateway_ids[local_idx]
             
             # Calculate weather stations for this specific gateway
             # First 'remainder' gateways get one extra station
@@ -433,68 +630,80 @@ class CitySimulator:
             
             # Find primary district for this gateway (based on middle edge)
             middle_edge = (edge_start + edge_end) // 2
-            district = find_district_for_edge(districts, middle_edge)
-            district_id = district['district_id'] if district else 'district-unknown'
-            district_center = district.get('center', {'latitude': 42.35, 'longitude': 13.40}) if district else {'latitude': 42.35, 'longitude': 13.40}
+            district_entry = find_district_for_edge(
+                self._district_for_edge, middle_edge, self._default_district
+            )
+            if district_entry:
+                district, (center_lat, center_lon) = district_entry
+                district_id = district['district_id']
+            else:
+                district_id = 'district-unknown'
+                center_lat, center_lon = DEFAULT_DISTRICT_CENTER
             
             # Gateway location (near district center with small offset)
+            offset_lat, offset_lon = location_offsets[local_idx]
             location = {
-                'latitude': district_center['latitude'] + random.uniform(-0.005, 0.005),
-                'longitude': district_center['longitude'] + random.uniform(-0.005, 0.005)
+                'latitude': center_lat + offset_lat,
+                'longitude': center_lon + offset_lon
             }
             
             # Generate sensors for all edges this gateway covers
-            sensors = generate_sensors_for_gateway(
-                gateway_id,
-                edge_start,
-                edge_end,
-                self.sensors_per_edge,
-                location,
-                gateway_weather_count,
-                self.edge_coords_map
+            gateway_config = build_gateway_config(
+                gateway_id=gateway_id,
+                edge_start=edge_start,
+                edge_end=edge_end,
+                location=location,
+                weather_stations_count=gateway_weather_count,
+                seed=gateway_seeds[local_idx],
+                sensors_per_edge=self.sensors_per_edge,
+                edge_coords_map=self.edge_coords_map,
+                edge_ids=self._edge_ids
             )
             
-            # Build gateway configuration
-            gateway_config = {
-                'gateway_id': gateway_id,
-                'name': f"Gateway {gateway_id} ({edge_end - edge_start + 1} edges)",
-                'location': location,
-                'sensors': sensors,
-                'edge_range': {'start': edge_start, 'end': edge_end}
-            }
-            
             # Create EdgeManager (Gateway)
             gateway = EdgeManager(
                 district_id=district_id,
                 edge_config=gateway_config,
                 kafka_producer=self.kafka_producer,
                 kafka_topics=KAFKA_TOPICS,
-                stop_event=self.stop_event,
-                sampling_interval=self.sampling_interval
+                sampling_interval=self.sampling_interval,
+                rng=self._rng
             )
             
             self.gateways.append(gateway)
             
             # Log gateway info
-            total_sensors = sum(len(s) for s in sensors.values())
-            logger.info(f"  {gateway_id}: edges E-{edge_start:05d} to E-{edge_end:05d}, {total_sensors} sensors")
+            edge_range = gateway_config['edge_range']
+            total_sensors = sum(len(s) for s in gateway_config['sensors'].values())
+            logger.info(
+                f"  {gateway.gateway_id}: edges E-{edge_range['start']:05d} to "
+                f"E-{edge_range['end']:05d}, {total_sensors} sensors"
+            )
         
         logger.info(f"  Initialized {len(self.gateways)} gateways")
     
     def start_gateways(self):
-        """Start all gateways in separate threads."""
+        """Start all gateways on a single scheduler thread."""
         logger.info("Starting all gateways...")
         
-        for gateway in self.gateways:
-            thread = threading.Thread(
-                target=gateway.run,
-                name=f"{gateway.gateway_id}",
-                daemon=True
-            )
-            thread.start()
-            self.gateway_threads.append(thread)
+        scheduler = GatewayScheduler(
+            self.gateways,
+            kafka_producer=self.kafka_producer,
+            kafka_topics=KAFKA_TOPICS,
+            instance_id=INSTANCE_ID,
+            stop_event=self.stop_event,
+            max_batch_size=GATEWAY_BATCH_MAX,
+            max_batch_bytes=GATEWAY_BATCH_MAX_BYTES,
+            batch_window=GATEWAY_BATCH_WINDOW_MS / 1000
+        )
+        self.scheduler_thread = threading.Thread(
+            target=scheduler.run,
+            name="gateway-scheduler",
+            daemon=True
+        )
+        self.scheduler_thread.start()
         
-        logger.info(f"✓ Started {len(self.gateway_threads)} gateway threads")
+        logger.info(f"✓ Started scheduler for {len(self.gateways)} gateways")
     
     def run(self):
         """Run the city simulator."""
@@ -515,8 +724,8 @@ class CitySimulator:
             self.start_gateways()
             logger.info("✓ System running. Press Ctrl+C to stop.")
             
-            while not self.stop_event.is_set():
-                time.sleep(1)
+            # Block until stop() is requested (no periodic wakeups)
+            self.stop_event.wait()
             
         except KeyboardInterrupt:
             logger.info("\n⚠ Shutdown requested...")
@@ -528,17 +737,22 @@ class CitySimulator:
         logger.info("Stopping all gateways...")
         self.stop_event.set()
         
-        for thread in self.gateway_threads:
-            thread.join(timeout=5)
+        if self.scheduler_thread:
+            self.scheduler_thread.join(timeout=5)
         
+        # Push out anything still lingering in the producer's batches
+        self.kafka_producer.flush(timeout=10)
         self.kafka_producer.close()
         logger.info("✓ City simulator stopped cleanly")
 
 
 if __name__ == '__main__':
+    log_listener = start_log_queue()
     try:
         simulator = CitySimulator()
         simulator.run()
     except Exception as e:
         logger.error(f"✗ Fatal error: {e}")
         sys.exit(1)
+    finally:
+        log_listener.stop()
@@ -2,12 +2,14 @@
 Edge Manager Module (Gateway)
 
 This module manages a single gateway location with its sensors.
-Each gateway runs in a separate thread, simulating concurrent operations
+Gateways do not own a thread: the GatewayScheduler calls tick() on each
+gateway at its own sampling interval, simulating concurrent operations
 at different physical locations in the city.
 
 A gateway represents a physical data collector in an area that hosts multiple 
 sensors of different types. Each sensor monitors a specific city graph edge.
-The gateway aggregates all sensor data and sends it to Kafka as a unified payload.
+The gateway aggregates all sensor data into a unified payload, which the
+GatewayScheduler sends to Kafka batched with the payloads of other gateways.
 
 Edge ID vs Gateway ID:
 - gateway_id: Unique identifier for the gateway device (GW-XXXXX). The gateway is the 
@@ -18,13 +20,11 @@ Edge ID vs Gateway ID:
 """
 
 import logging
-import random
-import threading
 import time
 from collections import deque
-from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+import numpy as np
 from sensor_simulator import (CameraSensorSimulator, SpeedSensorSimulator,
                               WeatherSensorSimulator)
 
@@ -35,30 +35,55 @@ GATEWAY_VERSION = "1.0.0"
 GATEWAY_FIRMWARE = "EdgeOS 2.1.3"
 
 
+def iso_now() -> str:
+    """
+    Current UTC time as an ISO 8601 string with microseconds (e.g. 2024-01-01T12:00:00.123456Z).
+    
+    Cheaper than datetime.utcnow().isoformat() + 'Z' and always includes
+    the fractional part, so the output has a fixed width.
+    """
+    seconds, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f".{nanoseconds // 1000:06d}Z"
+
+
 class EdgeManager:
     """
     Manages a single gateway with sensors across multiple graph edges.
     
     This class acts as a Gateway that gathers sensor data from all sensors
-    in its coverage area and sends it to Kafka as a unified payload.
+    in its coverage area and builds a unified payload for Kafka.
     Each sensor knows its own edge_id (which graph edge it monitors).
     
     Responsibilities:
     - Coordinate data generation from all sensors at this gateway
     - Aggregate all sensor data into a single gateway payload
-    - Send gateway payload to Kafka message bus
-    - Handle local buffering for resilience
-    - Run in separate thread for concurrent operation
+    - Hand the payload to the scheduler, which batches it to Kafka
+    - Handle local buffering and retries for resilience
+    - Run one non-blocking sampling iteration per tick()
     
     Thread Safety:
-    - Each EdgeManager has its own thread
+    - All gateways are ticked from the single scheduler thread
     - Shares only the Kafka producer (which is thread-safe)
+    - local_buffer may also be appended to from the producer's I/O
+      thread (delivery errbacks); deque appends are atomic
     - No shared state between gateways
+    
+    Uses __slots__: one instance per gateway, no per-instance __dict__.
     """
     
+    __slots__ = (
+        'district_id', 'gateway_id', 'gateway_name', '_gateway_key_bytes',
+        'location', 'sensors_config', 'edge_range',
+        'kafka_producer', 'kafka_topics',
+        'speed_simulator', 'weather_simulator', 'camera_simulator', '_generators',
+        'local_buffer', 'iteration', 'sampling_interval',
+        '_payload_template', '_total_sensors'
+    )
+    
     def __init__(self, district_id: str, edge_config: Dict, 
                  kafka_producer: Any, kafka_topics: Dict[str, str], 
-                 stop_event: threading.Event, sampling_interval: float = 3.0):
+                 sampling_interval: float = 3.0,
+                 rng: Optional[np.random.Generator] = None):
         """
         Initialize a Gateway Manager.
         
@@ -68,18 +93,21 @@ class EdgeManager:
                 - gateway_id: Unique gateway identifier
                 - name: Human-readable gateway name
                 - location: Dict with latitude/longitude
-                - sensors: Dict mapping sensor types to list of sensor configs
-                  Each sensor config includes its own edge_id
+                - sensors: Dict mapping sensor types to a SensorArray
+                  (each sensor includes its own edge_id)
                 - edge_range: Optional dict with start/end edges covered
             kafka_producer: Shared Kafka producer instance (thread-safe)
             kafka_topics: Dictionary mapping sensor types to topic names
-            stop_event: Threading event to signal shutdown
             sampling_interval: Sampling interval in seconds from config
+            rng: Random generator shared by all gateways of the instance
+                 (a new unseeded one is created if not given)
         """
         # Gateway identification
         self.district_id = district_id
         self.gateway_id = edge_config.get('gateway_id', 'unknown-gateway')
         self.gateway_name = edge_config.get('name', f"Gateway {self.gateway_id}")
+        # Partition key pre-encoded once (the producer has no key serializer)
+        self._gateway_key_bytes = self.gateway_id.encode('ascii')
         self.location = edge_config['location']
         self.sensors_config = edge_config.get('sensors', {})
         
@@ -89,29 +117,69 @@ class EdgeManager:
         # Kafka configuration
         self.kafka_producer = kafka_producer
         self.kafka_topics = kafka_topics
-        self.stop_event = stop_event
+        
+        if rng is None:
+            rng = np.random.default_rng()
         
         # Initialize sensor simulators
         # Each simulator maintains its own state (windows, persistence, etc.)
-        self.speed_simulator = SpeedSensorSimulator(self.location)
-        self.weather_simulator = WeatherSensorSimulator(self.location)
-        self.camera_simulator = CameraSensorSimulator(self.location)
+        self.speed_simulator = SpeedSensorSimulator(self.location, rng)
+        self.weather_simulator = WeatherSensorSimulator(self.location, rng)
+        self.camera_simulator = CameraSensorSimulator(self.location, rng)
+        
+        # Data generators specialized once for the configured sensor types:
+        # (bound generate_data method, sensor array), skipping types without sensors
+        self._generators = tuple(
+            (simulator.generate_data, self.sensors_config[sensor_type])
+            for sensor_type, simulator in (
+                ('speed', self.speed_simulator),
+                ('weather', self.weather_simulator),
+                ('camera', self.camera_simulator)
+            )
+            if len(self.sensors_config.get(sensor_type, []))
+        )
         
         # Local buffer for resilience
         self.local_buffer = deque(maxlen=1000)
         
+        # Number of sampling iterations run so far (drives periodic retries)
+        self.iteration = 0
+        
         # Use configured sampling interval with small randomization (±10%) to avoid synchronization
         jitter = sampling_interval * 0.1
-        self.sampling_interval = random.uniform(
+        self.sampling_interval = float(rng.uniform(
             sampling_interval - jitter, 
             sampling_interval + jitter
-        )
+        ))
         
-        # Log initialization
+        # Immutable part of the gateway payload, built once and shared by every tick
+        # Note: edge_id is NOT included at gateway level - it's a property of individual sensors
         speed_count = len(self.sensors_config.get('speed', []))
         weather_count = len(self.sensors_config.get('weather', []))
         camera_count = len(self.sensors_config.get('camera', []))
-        total_sensors = speed_count + weather_count + camera_count
+        self._payload_template = {
+            'gateway_id': self.gateway_id,
+            'district_id': self.district_id,
+            'location': {
+                'latitude': self.location['latitude'],
+                'longitude': self.location['longitude']
+            },
+            'metadata': {
+                'name': self.gateway_name,
+                'version': GATEWAY_VERSION,
+                'firmware': GATEWAY_FIRMWARE,
+                'sensor_counts': {
+                    'speed': speed_count,
+                    'weather': weather_count,
+                    'camera': camera_count
+                }
+            }
+        }
+        
+        self._total_sensors = speed_count + weather_count + camera_count
+        
+        # Log initialization
+        total_sensors = self._total_sensors
         
         logger.info(
             f"Gateway initialized: {self.gateway_id} ({self.gateway_name}) - "
@@ -119,141 +187,128 @@ class EdgeManager:
             f"({speed_count} speed, {weather_count} weather, {camera_count} camera)"
         )
     
-    def generate_sensor_data(self, sensor_type: str) -> Optional[Dict[str, Any]]:
-        """
-        Generate data for a specific sensor type.
-        
-        Each sensor in the config has its own edge_id. The sensor simulator
-        will use this edge_id when generating data for each sensor.
-        
-        Args:
-            sensor_type: One of 'speed', 'weather', 'camera'
-            
-        Returns:
-            Sensor data dict with readings, or None if no sensors
-        """
-        sensors_list = self.sensors_config.get(sensor_type, [])
-        if not sensors_list:
-            return None
-        
-        # Get sensor-specific data from appropriate simulator
-        # Pass the full sensor configs (which include per-sensor edge_id)
-        if sensor_type == 'speed':
-            sensor_data = self.speed_simulator.generate_data(
-                sensors_list,
-                self.gateway_id
-            )
-        elif sensor_type == 'weather':
-            sensor_data = self.weather_simulator.generate_data(
-                sensors_list,
-                self.gateway_id
-            )
-        elif sensor_type == 'camera':
-            sensor_data = self.camera_simulator.generate_data(
-                sensors_list,
-                self.gateway_id
-            )
-        else:
-            return None
-        
-        return sensor_data
-    
-    def generate_gateway_payload(self) -> Dict[str, Any]:
+    def generate_gateway_payload(self, timestamp: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate the unified gateway payload containing all sensor data.
         
         This method aggregates data from all sensors at this gateway
         and returns a single payload ready for Kafka.
         
+        Args:
+            timestamp: Pre-computed last_updated value (see iso_now());
+                       computed on the spot if not given
+        
         Returns:
             Complete gateway payload with metadata and sensors array
         """
-        # Collect sensor data from all sensor types
-        sensors = []
-        
-        # Generate speed sensor data
-        speed_data = self.generate_sensor_data('speed')
-        if speed_data:
-            sensors.extend(speed_data.get('readings', []))
+        # Collect sensor data from all sensor types into a list preallocated to
+        # the (fixed) number of sensors. A new list per tick is still needed:
+        # buffered and batched payloads keep a reference to it.
+        sensors = [None] * self._total_sensors
+        position = 0
+        for generate_data, sensor_array in self._generators:
+            sensor_data = generate_data(sensor_array, self.gateway_id)
+            if sensor_data:
+                readings = sensor_data['readings']
+                sensors[position:position + len(readings)] = readings
+                position += len(readings)
+        if position < self._total_sensors:
+            del sensors[position:]
         
-        # Generate weather sensor data
-        weather_data = self.generate_sensor_data('weather')
-        if weather_data:
-            sensors.extend(weather_data.get('readings', []))
-        
-        # Generate camera sensor data
-        camera_data = self.generate_sensor_data('camera')
-        if camera_data:
-            sensors.extend(camera_data.get('readings', []))
-        
-        # Build the gateway payload
-        # Note: edge_id is NOT included at gateway level - it's a property of individual sensors
-        payload = {
-            'gateway_id': self.gateway_id,
-            'district_id': self.district_id,
-            'location': {
-                'latitude': self.location['latitude'],
-                'longitude': self.location['longitude']
-            },
-            'last_updated': datetime.utcnow().isoformat() + 'Z',
-            'metadata': {
-                'name': self.gateway_name,
-                'version': GATEWAY_VERSION,
-                'firmware': GATEWAY_FIRMWARE,
-                'sensor_counts': {
-                    'speed': len(self.sensors_config.get('speed', [])),
-                    'weather': len(self.sensors_config.get('weather', [])),
-                    'camera': len(self.sensors_config.get('camera', []))
-                }
-            },
-            'sensors': sensors
-        }
+        # Build the gateway payload on top of the constant template
+        # (location and metadata dicts are shared between payloads and never mutated)
+        payload = self._payload_template.copy()
+        payload['last_updated'] = timestamp or iso_now()
+        payload['sensors'] = sensors
         
         return payload
     
     def send_to_kafka(self, data: Dict[str, Any]) -> bool:
         """
-        Send gateway data to Kafka with error handling.
+        Send a single gateway payload to Kafka with error handling.
+        
+        Regular ticks are batched by the GatewayScheduler; this path is used
+        to re-send payloads from the local buffer.
         
         Implements resilience pattern:
-        1. Try to send to Kafka
-        2. On failure, buffer locally
+        1. Hand the payload to the producer (fire-and-forget)
+        2. On failure, buffer locally (immediately or via the errback)
         3. Retry buffered messages later
         
         Args:
             data: Gateway payload to send
             
         Returns:
-            True if sent successfully, False if buffered
+            True if handed to the producer, False if buffered
+        """
+        if self._try_send_nowait(data):
+            return True
+        self.local_buffer.append(data)
+        return False
+    
+    def _try_send_nowait(self, data: Dict[str, Any]) -> bool:
+        """
+        Hand a gateway payload to the producer without waiting for the broker.
+        
+        The shared producer batches payloads from all gateways; delivery
+        errors are reported asynchronously through _on_kafka_error.
+        
+        Args:
+            data: Gateway payload to send
+            
+        Returns:
+            True if the producer accepted the payload, False otherwise
+            (the payload is NOT buffered in that case)
         """
         try:
             # Use the gateway topic for all gateway data
             topic = self.kafka_topics.get('gateway', 'city-gateway-data')
             
-            logger.info(f"[{self.gateway_id}] 📤 Sending gateway data to {topic}...")
-            
-            # Async send with timeout and partition key
+            # Async send with partition key
             # Using gateway_id as key ensures all data for this gateway goes to same partition
             future = self.kafka_producer.send(
                 topic, 
-                key=self.gateway_id,  # Partition key
+                key=self._gateway_key_bytes,  # Partition key
                 value=data
             )
-            future.get(timeout=10)  # Wait max 10 seconds
-            sensor_count = len(data.get('sensors', []))
-            logger.info(f"[{self.gateway_id}] ✓ Sent gateway data ({sensor_count} sensors) to {topic}")
+            future.add_errback(self._on_kafka_error, data)
+            if logger.isEnabledFor(logging.DEBUG):
+                sensor_count = len(data.get('sensors', []))
+                logger.debug(f"[{self.gateway_id}] ✓ Queued gateway data ({sensor_count} sensors) for {topic}")
             return True
         except Exception as e:
-            # Log error and buffer message for retry
-            logger.error(f"[{self.gateway_id}] Kafka error: {e}. Buffering message.")
-            self.local_buffer.append(data)
+            logger.error(f"[{self.gateway_id}] Kafka error: {e}")
             return False
     
+    def _on_kafka_error(self, data: Dict[str, Any], error: Exception):
+        """
+        Errback for asynchronous send failures.
+        
+        Runs on the producer's I/O thread; buffers the payload so it is
+        picked up by the next retry cycle.
+        
+        Args:
+            data: Gateway payload that failed to be delivered
+            error: Exception reported by the producer
+        """
+        logger.error(f"[{self.gateway_id}] Kafka error: {error}. Buffering message.")
+        self.local_buffer.append(data)
+    
     def retry_buffered_messages(self):
         """
         Attempt to send buffered messages.
         
         Called periodically when Kafka might be available again.
+        Messages are sent oldest first; each one is popped before it is sent
+        and put back at the front if the producer rejects it, so the first
+        failure stops the cycle without copying the buffer or reordering
+        what is left in it. Popping first keeps this safe against errbacks
+        appending from the producer's I/O thread: an append that evicts the
+        head of the full buffer can no longer drop a message that was
+        never sent.
+        Each cycle tries at most the messages buffered when it starts: a
+        send whose future has already failed re-buffers the payload through
+        the errback, and that payload waits for the next cycle.
         Implements simple retry logic without sophisticated backoff.
         """
         if not self.local_buffer:
@@ -261,56 +316,59 @@ class EdgeManager:
         
         logger.info(f"[{self.gateway_id}] Retrying {len(self.local_buffer)} buffered messages")
         
-        # Try to send all buffered messages
-        messages_to_retry = list(self.local_buffer)
-        self.local_buffer.clear()
-        
-        for message in messages_to_retry:
-            if not self.send_to_kafka(message):
-                # Still failing, will be re-buffered
+        for _ in range(len(self.local_buffer)):
+            data = self.local_buffer.popleft()
+            if not self._try_send_nowait(data):
+                # Still failing, keep it and the rest for the next cycle
+                self.local_buffer.appendleft(data)
                 break
     
-    def run(self):
+    def tick(self, timestamp: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
-        Main loop for this gateway: generate and send gateway data.
+        Run one sampling iteration for this gateway.
         
         Execution Flow:
         1. Generate unified gateway payload with all sensors
-        2. Send to Kafka
-        3. Wait for next interval
-        4. Repeat until stop signal
+        2. Return it to the scheduler, which batches it with the payloads
+           of other gateways due in the same pass into one Kafka message
+        3. Periodically retry buffered messages
         
-        This method runs in a separate thread, one per gateway.
-        """
-        logger.info(f"[{self.gateway_id}] Starting gateway loop (interval: {self.sampling_interval:.1f}s)")
+        Called by the GatewayScheduler every sampling_interval seconds;
+        it never blocks, so a single scheduler thread can drive every
+        gateway of the instance.
         
-        iteration = 0
-        while not self.stop_event.is_set():
-            try:
-                iteration += 1
-                
-                logger.info(f"[{self.gateway_id}] Iteration {iteration}: Generating gateway payload")
-                
-                # Generate unified gateway payload with all sensor data
-                payload = self.generate_gateway_payload()
-                
-                # Send gateway payload to Kafka
-                if payload.get('sensors'):
-                    logger.info(f"[{self.gateway_id}] Payload generated with {len(payload['sensors'])} sensors, sending to Kafka...")
-                    self.send_to_kafka(payload)
-                else:
-                    logger.info(f"[{self.gateway_id}] No sensors configured, skipping")
-                
-                # Periodically retry buffered messages
-                if iteration % 10 == 0:
-                    self.retry_buffered_messages()
-                
-                # Wait for next interval (interruptible sleep)
-                self.stop_event.wait(timeout=self.sampling_interval)
-                
-            except Exception as e:
-                # Log error but keep running (fault tolerance)
-                logger.error(f"[{self.gateway_id}] Error in gateway loop: {e}")
-                self.stop_event.wait(timeout=self.sampling_interval)
+        Args:
+            timestamp: last_updated value shared by all gateways ticked in
+                       the same scheduler pass (see iso_now())
         
-        logger.info(f"[{self.gateway_id}] Gateway loop stopped")
+        Returns:
+            Gateway payload to send, or None if there is nothing to send
+        """
+        try:
+            self.iteration += 1
+            
+            # Periodically retry buffered messages
+            if self.iteration % 10 == 0:
+                self.retry_buffered_messages()
+            
+            # Generate unified gateway payload with all sensor data
+            payload = self.generate_gateway_payload(timestamp)
+            
+            # Hot path: per-tick details only at DEBUG, plus a sampled INFO heartbeat
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"[{self.gateway_id}] Iteration {self.iteration}: "
+                    f"payload generated with {len(payload['sensors'])} sensors"
+                )
+            elif self.iteration % 100 == 0:
+                logger.info(f"[{self.gateway_id}] {self.iteration} iterations completed")
+            
+            if not payload.get('sensors'):
+                return None
+            
+            return payload
+                
+        except Exception as e:
+            # Log error but keep running (fault tolerance)
+            logger.error(f"[{self.gateway_id}] Error in gateway tick: {e}")
+            return None
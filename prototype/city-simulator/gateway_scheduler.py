@@ -0,0 +1,177 @@
+"""
+Gateway Scheduler Module
+
+Drives every gateway of a simulator instance from a single thread.
+
+Instead of one OS thread per gateway (mostly sleeping between samples),
+the scheduler keeps a min-heap of (next_deadline, gateway) entries. It pops
+the gateway whose deadline is earliest, runs one non-blocking tick() and
+pushes it back with its next deadline. The per-gateway randomized
+sampling_interval spreads the ticks out naturally over time.
+
+Payloads of all gateways ticked in the same pass are packed into a single
+batch message, so the broker sees one record per pass instead of one per
+gateway:
+
+    {
+        "instance_id": 0,
+        "ts": "2024-01-01T12:00:00.123456Z",
+        "gateways": [<gateway payload>, ...]
+    }
+
+A batch is closed once it reaches max_batch_size payloads or max_batch_bytes
+of encoded payloads, so messages stay below the producer's max_request_size.
+Each payload is encoded once with orjson to measure it, and the encoded
+bytes are embedded in the message as orjson.Fragment, so the producer's
+orjson value serializer does not encode them again.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import orjson
+from edge_manager import EdgeManager, iso_now
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayScheduler:
+    """
+    Single-threaded scheduler for all gateways of this instance.
+
+    Each heap entry is (deadline, index, gateway); the index breaks ties
+    between gateways due at the same instant so EdgeManager objects are
+    never compared. Deadlines use the monotonic clock.
+    """
+
+    def __init__(self, gateways: List[EdgeManager], kafka_producer: Any,
+                 kafka_topics: Dict[str, str], instance_id: int,
+                 stop_event: threading.Event, max_batch_size: int = 100,
+                 max_batch_bytes: int = 900000, batch_window: float = 0.05):
+        """
+        Initialize the scheduler.
+
+        Args:
+            gateways: EdgeManager instances to drive
+            kafka_producer: Shared Kafka producer instance
+            kafka_topics: Dictionary mapping sensor types to topic names
+            instance_id: Simulator instance ID (batch partition key)
+            stop_event: Threading event to signal shutdown
+            max_batch_size: Maximum gateway payloads per Kafka message
+            max_batch_bytes: Maximum encoded gateway payload bytes per Kafka
+                             message (keep below the producer's max_request_size)
+            batch_window: Gateways due within this many seconds of the
+                          earliest one are ticked in the same pass
+        """
+        self.gateways = gateways
+        self.kafka_producer = kafka_producer
+        self.topic = kafka_topics.get('gateway', 'city-gateway-data')
+        self.instance_id = instance_id
+        # Partition key pre-encoded once (the producer has no key serializer)
+        self._instance_key_bytes = str(instance_id).encode('ascii')
+        self.stop_event = stop_event
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_bytes = max_batch_bytes
+        self.batch_window = batch_window
+
+    def send_batch(self, batch: List[Tuple[EdgeManager, Dict[str, Any], bytes]], timestamp: str):
+        """
+        Send the payloads of several gateways as one Kafka message.
+
+        Uses the instance ID as partition key to preserve per-instance
+        ordering. On failure every payload is handed back to the local
+        buffer of its own gateway, which retries it individually.
+
+        Args:
+            batch: (gateway, payload, encoded payload) triples produced in this pass
+            timestamp: Timestamp shared by the payloads of this pass
+        """
+        message = {
+            'instance_id': self.instance_id,
+            'ts': timestamp,
+            'gateways': [orjson.Fragment(encoded) for _, _, encoded in batch]
+        }
+        try:
+            future = self.kafka_producer.send(
+                self.topic,
+                key=self._instance_key_bytes,  # Partition key
+                value=message
+            )
+            future.add_errback(self._on_batch_error, batch)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"✓ Queued batch of {len(batch)} gateway payloads for {self.topic}")
+        except Exception as e:
+            self._on_batch_error(batch, e)
+
+    def _on_batch_error(self, batch: List[Tuple[EdgeManager, Dict[str, Any], bytes]], error: Exception):
+        """
+        Buffer every payload of a failed batch in its gateway's local buffer.
+
+        Args:
+            batch: (gateway, payload, encoded payload) triples of the failed batch
+            error: Exception raised or reported by the producer
+        """
+        logger.error(f"Kafka error: {error}. Buffering {len(batch)} gateway payloads.")
+        for gateway, payload, _ in batch:
+            gateway.local_buffer.append(payload)
+
+    def run(self):
+        """
+        Main scheduler loop: tick each gateway when its deadline is due.
+
+        Every gateway ticks once immediately, then every sampling_interval
+        seconds. All gateways due in the same pass share one last_updated
+        timestamp and are sent in batches of up to max_batch_size payloads
+        and max_batch_bytes encoded bytes.
+        A gateway that falls more than a full interval behind is
+        rescheduled one interval from now instead of firing a burst of
+        catch-up ticks.
+        """
+        logger.info(f"Starting gateway scheduler ({len(self.gateways)} gateways)")
+
+        now = time.monotonic()
+        heap = [(now, index, gateway) for index, gateway in enumerate(self.gateways)]
+        heapq.heapify(heap)
+
+        while heap and not self.stop_event.is_set():
+            # Wait for the earliest deadline (interruptible sleep)
+            now = time.monotonic()
+            delay = heap[0][0] - now
+            if delay > 0:
+                self.stop_event.wait(timeout=delay)
+                continue
+
+            # Tick every gateway due in this pass, sharing one timestamp
+            timestamp = iso_now()
+            horizon = now + self.batch_window
+            batch = []
+            batch_bytes = 0
+            while heap and heap[0][0] <= horizon:
+                deadline, index, gateway = heap[0]
+                payload = gateway.tick(timestamp)
+                if payload:
+                    encoded = orjson.dumps(payload)
+                    # Close the batch before it would outgrow the byte cap
+                    if batch and batch_bytes + len(encoded) > self.max_batch_bytes:
+                        self.send_batch(batch, timestamp)
+                        batch = []
+                        batch_bytes = 0
+                    batch.append((gateway, payload, encoded))
+                    batch_bytes += len(encoded)
+                    if len(batch) >= self.max_batch_size:
+                        self.send_batch(batch, timestamp)
+                        batch = []
+                        batch_bytes = 0
+
+                next_deadline = deadline + gateway.sampling_interval
+                if next_deadline <= now:
+                    next_deadline = now + gateway.sampling_interval
+                heapq.heapreplace(heap, (next_deadline, index, gateway))
+
+            if batch:
+                self.send_batch(batch, timestamp)
+
+        logger.info("Gateway scheduler stopped")
@@ -8,54 +8,170 @@ This module contains the logic for simulating different types of sensors:
 
 Each sensor type generates realistic data with proper aggregation from
 multiple physical sensors at the same location.
+
+All random values of a tick are drawn in one NumPy call per sensor type
+(uniform [0, 1) samples) and then scaled to each reading's range. Scaling
+is vectorized only for large sensor arrays: most gateways hold just a few
+sensors, where the fixed cost of each NumPy operation exceeds plain Python
+arithmetic on the drawn values.
 """
 
-import random
+from bisect import bisect_right
 from collections import deque
-from typing import Any, Dict, List, Optional
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Possible weather conditions (same for all sensors in an area)
+WEATHER_CONDITIONS = ('clear', 'cloudy', 'rainy', 'foggy', 'snowy')
+
+# Probability distribution for road conditions
+# (realistic distribution for normal city traffic)
+ROAD_CONDITIONS = ('clear', 'congestion', 'accident', 'obstacles', 'flooding')
+ROAD_CONDITION_PROBABILITIES = (
+    0.50,   # 50% - Normal traffic
+    0.25,   # 25% - Traffic jam
+    0.05,   # 5%  - Accident
+    0.10,   # 10% - Debris/obstacles
+    0.10    # 10% - Water on road
+)
+# Cumulative thresholds for mapping a uniform draw to a condition index
+# (the last condition takes everything above the final threshold)
+ROAD_CONDITION_THRESHOLDS = tuple(accumulate(ROAD_CONDITION_PROBABILITIES))[:-1]
+
+# Sensor count from which draws are scaled with NumPy instead of in Python
+VECTORIZE_MIN_SENSORS = 32
+
+
+def scale_draws(draws: np.ndarray, low: float, high: float, digits: int) -> List[float]:
+    """
+    Map uniform [0, 1) draws to rounded values in [low, high).
+    
+    Args:
+        draws: 1-D array of uniform draws
+        low: Lower bound of the range
+        high: Upper bound of the range
+        digits: Decimal places to round to
+        
+    Returns:
+        List of rounded values, one per draw
+    """
+    span = high - low
+    if len(draws) >= VECTORIZE_MIN_SENSORS:
+        return np.round(low + span * draws, digits).tolist()
+    return [round(low + span * draw, digits) for draw in draws.tolist()]
+
+
+def draw_integers(draws: np.ndarray, low: int, high: int) -> List[int]:
+    """
+    Map uniform [0, 1) draws to integers in [low, high).
+    
+    Args:
+        draws: 1-D array of uniform draws
+        low: Lowest integer (inclusive)
+        high: Highest integer (exclusive)
+        
+    Returns:
+        List of integers, one per draw
+    """
+    span = high - low
+    if len(draws) >= VECTORIZE_MIN_SENSORS:
+        return (low + (span * draws).astype(np.int64)).tolist()
+    return [low + int(span * draw) for draw in draws.tolist()]
+
+
+def draw_road_conditions(draws: np.ndarray) -> List[int]:
+    """
+    Map uniform [0, 1) draws to ROAD_CONDITIONS indices.
+    
+    Samples ROAD_CONDITION_PROBABILITIES through the precomputed cumulative
+    thresholds, avoiding Generator.choice(p=...), which re-validates the
+    probabilities on every call.
+    
+    Args:
+        draws: 1-D array of uniform draws
+        
+    Returns:
+        List of condition indices, one per draw
+    """
+    if len(draws) >= VECTORIZE_MIN_SENSORS:
+        return np.searchsorted(ROAD_CONDITION_THRESHOLDS, draws, side='right').tolist()
+    return [bisect_right(ROAD_CONDITION_THRESHOLDS, draw) for draw in draws.tolist()]
+
+
+class SensorArray:
+    """
+    Configuration of all sensors of one type at a gateway (structure of arrays).
+    
+    Instead of one dict per sensor, each field is stored as a column the
+    simulators zip over; dicts are only materialized in the final readings.
+    Sensors never move, so their GPS coordinates are resolved once here
+    rather than on every tick.
+    
+    Attributes:
+        ids: Sensor IDs
+        edge_ids: Graph edge monitored by each sensor
+        locations: Human-readable location descriptions
+        latitudes: Sensor latitudes rounded to 6 decimal places
+        longitudes: Sensor longitudes rounded to 6 decimal places
+    """
+    
+    __slots__ = ('ids', 'edge_ids', 'locations', 'latitudes', 'longitudes')
+    
+    def __init__(self, ids: List[str], edge_ids: List[str], locations: List[str],
+                 offsets: Sequence, base_locations: Sequence,
+                 gateway_location: Dict[str, float]):
+        """
+        Initialize the sensor array.
+        
+        Args:
+            ids: Sensor IDs
+            edge_ids: Graph edge monitored by each sensor
+            locations: Human-readable location descriptions
+            offsets: (lat, lon) offset of each sensor
+            base_locations: Actual edge (lat, lon) of each sensor from the city
+                            graph; NaN rows fall back to the gateway location
+            gateway_location: Dict with 'latitude' and 'longitude' of the gateway
+        """
+        self.ids = ids
+        self.edge_ids = edge_ids
+        self.locations = locations
+        
+        # Use actual edge location if available, otherwise use gateway location
+        offsets = np.asarray(offsets, dtype=np.float64).reshape(-1, 2)
+        base_locations = np.asarray(base_locations, dtype=np.float64).reshape(-1, 2)
+        fallback = (gateway_location['latitude'], gateway_location['longitude'])
+        base = np.where(np.isnan(base_locations), fallback, base_locations)
+        coordinates = np.round(base + offsets, 6)
+        self.latitudes = coordinates[:, 0].tolist()
+        self.longitudes = coordinates[:, 1].tolist()
+    
+    def __len__(self) -> int:
+        return len(self.ids)
 
 
 class SensorSimulator:
     """
     Base class for sensor simulation.
     
-    Handles common functionality like data buffers and GPS coordinate calculations.
+    Handles common functionality like the base location and random generator.
     Subclasses implement specific sensor logic.
     """
     
-    def __init__(self, location: Dict[str, float]):
+    __slots__ = ('location', 'rng')
+    
+    def __init__(self, location: Dict[str, float], rng: Optional[np.random.Generator] = None):
         """
         Initialize sensor simulator.
         
         Args:
             location: Dict with 'latitude' and 'longitude' keys for base location
+            rng: Random generator shared by the simulator instance (a new
+                 unseeded one is created if not given)
         """
         self.location = location
-    
-    def calculate_sensor_gps(self, sensor_config: Dict) -> tuple:
-        """
-        Calculate GPS coordinates for a specific sensor with offset.
-        
-        Uses actual edge coordinates from graph data if available (stored in base_location),
-        otherwise falls back to gateway location with offset.
-        
-        Args:
-            sensor_config: Sensor configuration with optional offset_lat, offset_lon,
-                          and base_location (actual edge coordinates from graph)
-            
-        Returns:
-            Tuple of (latitude, longitude) rounded to 6 decimal places
-        """
-        # Use actual edge location if available, otherwise use gateway location
-        base_location = sensor_config.get('base_location')
-        if base_location:
-            lat = base_location['latitude'] + sensor_config.get('offset_lat', 0)
-            lon = base_location['longitude'] + sensor_config.get('offset_lon', 0)
-        else:
-            lat = self.location['latitude'] + sensor_config.get('offset_lat', 0)
-            lon = self.location['longitude'] + sensor_config.get('offset_lon', 0)
-        
-        return round(lat, 6), round(lon, 6)
+        self.rng = rng if rng is not None else np.random.default_rng()
 
 
 class SpeedSensorSimulator(SensorSimulator):
@@ -66,12 +182,14 @@ class SpeedSensorSimulator(SensorSimulator):
     Implements pre-aggregation with moving average to smooth out noise.
     """
     
-    def __init__(self, location: Dict[str, float]):
-        super().__init__(location)
+    __slots__ = ('speed_window',)
+    
+    def __init__(self, location: Dict[str, float], rng: Optional[np.random.Generator] = None):
+        super().__init__(location, rng)
         # Moving average window - stores last 10 aggregated readings
         self.speed_window = deque(maxlen=10)
     
-    def generate_data(self, sensors_config: List[Dict], gateway_id: str = None) -> Optional[Dict[str, Any]]:
+    def generate_data(self, sensors: SensorArray, gateway_id: str = None) -> Optional[Dict[str, Any]]:
         """
         Generate aggregated speed data from multiple speed sensors.
         
@@ -82,30 +200,31 @@ class SpeedSensorSimulator(SensorSimulator):
         4. Calculate edge-level speed (average of window)
         
         Args:
-            sensors_config: List of sensor configurations with IDs, positions,
-                           and individual edge_id for each sensor
+            sensors: Sensor array with IDs, positions, and individual
+                     edge_id for each sensor
             gateway_id: ID of the gateway collecting this data
             
         Returns:
             Dict with aggregated speed data, or None if no sensors configured
         """
-        if not sensors_config:
+        if not len(sensors):
             return None
         
         # Step 1: Collect readings from each physical sensor
+        # Simulate speed readings (realistic range for city traffic)
+        speeds = scale_draws(self.rng.random(len(sensors)), 20, 120, 2)
+        
         sensor_readings = []
-        for sensor in sensors_config:
-            # Simulate speed reading (realistic range for city traffic)
-            current_speed = random.uniform(20, 120)
-            lat, lon = self.calculate_sensor_gps(sensor)
-            
+        for sensor_id, edge_id, lat, lon, current_speed in zip(
+            sensors.ids, sensors.edge_ids, sensors.latitudes, sensors.longitudes, speeds
+        ):
             # Each sensor has its own edge_id from config
             sensor_reading = {
-                'sensor_id': sensor['sensor_id'],
+                'sensor_id': sensor_id,
                 'sensor_type': 'speed',
                 'gateway_id': gateway_id,
-                'edge_id': sensor.get('edge_id'),  # Per-sensor edge_id
-                'speed_kmh': round(current_speed, 2),
+                'edge_id': edge_id,  # Per-sensor edge_id
+                'speed_kmh': current_speed,
                 'latitude': lat,
                 'longitude': lon,
                 'unit': 'km/h',
@@ -114,7 +233,7 @@ class SpeedSensorSimulator(SensorSimulator):
             sensor_readings.append(sensor_reading)
         
         # Step 2: Calculate instantaneous average across sensors
-        avg_speed = sum(r['speed_kmh'] for r in sensor_readings) / len(sensor_readings)
+        avg_speed = sum(speeds) / len(speeds)
         
         # Step 3: Add to moving average window (smoothing)
         self.speed_window.append(avg_speed)
@@ -140,12 +259,14 @@ class WeatherSensorSimulator(SensorSimulator):
     Multiple sensors provide redundancy and better coverage of the area.
     """
     
-    def __init__(self, location: Dict[str, float]):
-        super().__init__(location)
+    __slots__ = ('temp_window',)
+    
+    def __init__(self, location: Dict[str, float], rng: Optional[np.random.Generator] = None):
+        super().__init__(location, rng)
         # Moving average window for temperature smoothing
         self.temp_window = deque(maxlen=10)
     
-    def generate_data(self, sensors_config: List[Dict], gateway_id: str = None) -> Optional[Dict[str, Any]]:
+    def generate_data(self, sensors: SensorArray, gateway_id: str = None) -> Optional[Dict[str, Any]]:
         """
         Generate aggregated weather data from multiple weather stations.
         
@@ -156,38 +277,39 @@ class WeatherSensorSimulator(SensorSimulator):
         4. Weather conditions are assumed same for all sensors in area
         
         Args:
-            sensors_config: List of weather sensor configurations with
-                           individual edge_id for each sensor
+            sensors: Weather sensor array with individual edge_id
+                     for each sensor
             gateway_id: ID of the gateway collecting this data
             
         Returns:
             Dict with aggregated weather data, or None if no sensors
         """
-        if not sensors_config:
+        if not len(sensors):
             return None
         
         # Weather conditions (same for all sensors in this area)
-        weather_conditions = random.choice([
-            'clear', 'cloudy', 'rainy', 'foggy', 'snowy'
-        ])
+        weather_conditions = WEATHER_CONDITIONS[int(self.rng.random() * len(WEATHER_CONDITIONS))]
         
         # Step 1: Collect readings from each weather station
+        temperature_draws, humidity_draws = self.rng.random((2, len(sensors)))
+        # Realistic temperature range for L'Aquila (-10°C to 40°C)
+        temperatures = scale_draws(temperature_draws, -10, 40, 2)
+        # Humidity range (30-95%)
+        humidities = scale_draws(humidity_draws, 30, 95, 2)
+        
         sensor_readings = []
-        for sensor in sensors_config:
-            # Realistic temperature range for L'Aquila (-10°C to 40°C)
-            current_temp = random.uniform(-10, 40)
-            # Humidity range (30-95%)
-            current_humidity = random.uniform(30, 95)
-            lat, lon = self.calculate_sensor_gps(sensor)
-            
+        for sensor_id, edge_id, lat, lon, current_temp, current_humidity in zip(
+            sensors.ids, sensors.edge_ids, sensors.latitudes, sensors.longitudes,
+            temperatures, humidities
+        ):
             # Each sensor has its own edge_id from config
             sensor_reading = {
-                'sensor_id': sensor['sensor_id'],
+                'sensor_id': sensor_id,
                 'sensor_type': 'weather',
                 'gateway_id': gateway_id,
-                'edge_id': sensor.get('edge_id'),  # Per-sensor edge_id
-                'temperature_c': round(current_temp, 2),
-                'humidity': round(current_humidity, 2),
+                'edge_id': edge_id,  # Per-sensor edge_id
+                'temperature_c': current_temp,
+                'humidity': current_humidity,
                 'weather_conditions': weather_conditions,
                 'latitude': lat,
                 'longitude': lon,
@@ -197,8 +319,8 @@ class WeatherSensorSimulator(SensorSimulator):
             sensor_readings.append(sensor_reading)
         
         # Step 2: Calculate spatial averages
-        avg_temp = sum(r['temperature_c'] for r in sensor_readings) / len(sensor_readings)
-        avg_humidity = sum(r['humidity'] for r in sensor_readings) / len(sensor_readings)
+        avg_temp = sum(temperatures) / len(temperatures)
+        avg_humidity = sum(humidities) / len(humidities)
         
         # Step 3: Apply temporal smoothing to temperature
         self.temp_window.append(avg_temp)
@@ -228,14 +350,16 @@ class CameraSensorSimulator(SensorSimulator):
     to reduce bandwidth and latency.
     """
     
-    def __init__(self, location: Dict[str, float]):
-        super().__init__(location)
+    __slots__ = ('last_road_condition', 'condition_persistence')
+    
+    def __init__(self, location: Dict[str, float], rng: Optional[np.random.Generator] = None):
+        super().__init__(location, rng)
         # State tracking for realistic condition persistence
         # (real road conditions don't change every second)
         self.last_road_condition = 'clear'
         self.condition_persistence = 0  # Frames remaining with same condition
     
-    def generate_data(self, sensors_config: List[Dict], gateway_id: str = None) -> Optional[Dict[str, Any]]:
+    def generate_data(self, sensors: SensorArray, gateway_id: str = None) -> Optional[Dict[str, Any]]:
         """
         Generate aggregated camera analytics from multiple cameras.
         
@@ -249,53 +373,50 @@ class CameraSensorSimulator(SensorSimulator):
         Criticality Priority: accident > flooding > obstacles > congestion > clear
         
         Args:
-            sensors_config: List of camera sensor configurations with
-                           individual edge_id for each sensor
+            sensors: Camera sensor array with individual edge_id
+                     for each sensor
             gateway_id: ID of the gateway collecting this data
             
         Returns:
             Dict with aggregated road condition analysis, or None if no cameras
         """
-        if not sensors_config:
+        if not len(sensors):
             return None
         
-        # Probability distribution for road conditions
-        # (realistic distribution for normal city traffic)
-        road_conditions = [
-            ('clear', 0.50),        # 50% - Normal traffic
-            ('congestion', 0.25),   # 25% - Traffic jam
-            ('accident', 0.05),     # 5%  - Accident
-            ('obstacles', 0.10),    # 10% - Debris/obstacles
-            ('flooding', 0.10)      # 10% - Water on road
-        ]
+        condition_draws, confidence_draws, light_draws, heavy_draws = self.rng.random((4, len(sensors)))
         
         # Step 1: Each camera performs independent analysis
+        # Simulate computer vision detection
+        detected = draw_road_conditions(condition_draws)
+        
+        # Confidence score (0.75-0.98 for good quality cameras)
+        confidences = scale_draws(confidence_draws, 0.75, 0.98, 3)
+        
+        # Vehicle counting (only relevant for clear/congestion)
+        light_traffic = draw_integers(light_draws, 0, 16)    # Light traffic
+        heavy_traffic = draw_integers(heavy_draws, 20, 81)   # Heavy traffic
+        
         sensor_readings = []
-        for sensor in sensors_config:
-            # Simulate computer vision detection
-            conditions, probabilities = zip(*road_conditions)
-            detected_condition = random.choices(conditions, probabilities)[0]
+        for sensor_id, edge_id, lat, lon, condition_index, confidence, light, heavy in zip(
+            sensors.ids, sensors.edge_ids, sensors.latitudes, sensors.longitudes, detected,
+            confidences, light_traffic, heavy_traffic
+        ):
+            detected_condition = ROAD_CONDITIONS[condition_index]
             
-            # Confidence score (0.75-0.98 for good quality cameras)
-            confidence = random.uniform(0.75, 0.98)
-            
-            # Vehicle counting (only relevant for clear/congestion)
             vehicle_count = None
             if detected_condition == 'clear':
-                vehicle_count = random.randint(0, 15)  # Light traffic
+                vehicle_count = light
             elif detected_condition == 'congestion':
-                vehicle_count = random.randint(20, 80)  # Heavy traffic
-            
-            lat, lon = self.calculate_sensor_gps(sensor)
+                vehicle_count = heavy
             
             # Each sensor has its own edge_id from config
             sensor_reading = {
-                'sensor_id': sensor['sensor_id'],
+                'sensor_id': sensor_id,
                 'sensor_type': 'camera',
                 'gateway_id': gateway_id,
-                'edge_id': sensor.get('edge_id'),  # Per-sensor edge_id
+                'edge_id': edge_id,  # Per-sensor edge_id
                 'road_condition': detected_condition,
-                'confidence': round(confidence, 3),
+                'confidence': confidence,
                 'vehicle_count': vehicle_count,
                 'latitude': lat,
                 'longitude': lon,
@@ -333,7 +454,7 @@ class CameraSensorSimulator(SensorSimulator):
         else:
             self.last_road_condition = edge_road_condition
             # New condition will persist for 3-8 iterations
-            self.condition_persistence = random.randint(3, 8)
+            self.condition_persistence = 3 + int(self.rng.random() * 6)
         
         # Aggregate vehicle count if available
         edge_vehicle_count = None
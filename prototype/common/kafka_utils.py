@@ -30,7 +30,8 @@ logger = logging.getLogger(__name__)
 def create_kafka_producer(
     bootstrap_servers: str,
     max_retries: int = 5,
-    retry_delay: int = 5
+    retry_delay: int = 5,
+    **producer_config
 ) -> KafkaProducer:
     """
     Create a Kafka producer with retry logic.
@@ -39,6 +40,8 @@ def create_kafka_producer(
         bootstrap_servers: Comma-separated list of Kafka broker addresses
         max_retries: Maximum number of connection attempts
         retry_delay: Seconds to wait between retries
+        **producer_config: Extra KafkaProducer settings (e.g. linger_ms,
+            batch_size, compression_type) overriding the defaults below
     
     Returns:
         Connected KafkaProducer instance
@@ -50,15 +53,20 @@ def create_kafka_producer(
     servers_list = bootstrap_servers.split(",")
     logger.info(f"Bootstrap servers: {servers_list}")
     
+    config = {
+        'value_serializer': lambda v: json.dumps(v).encode('utf-8'),
+        'key_serializer': lambda k: k.encode('utf-8') if k else None,
+        'acks': 1,
+        'request_timeout_ms': 30000,
+        'api_version': (2, 5, 0)
+    }
+    config.update(producer_config)
+    
     for attempt in range(1, max_retries + 1):
         try:
             producer = KafkaProducer(
                 bootstrap_servers=bootstrap_servers.split(','),
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                key_serializer=lambda k: k.encode('utf-8') if k else None,
-                acks=1,
-                request_timeout_ms=30000,
-                api_version=(2, 5, 0)
+                **config
             )
             logger.info(f"✓ Kafka producer connected successfully")
             return producer
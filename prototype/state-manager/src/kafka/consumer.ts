@@ -55,6 +55,13 @@ interface GatewayMessage {
   sensors: GatewaySensorReading[];  // Each sensor has its own edge_id
 }
 
+// Batch of gateway payloads sent by one city-simulator instance
+interface GatewayBatchMessage {
+  instance_id: number;
+  ts: string;
+  gateways: GatewayMessage[];
+}
+
 /**
  * Buildings-Simulator Message Types
  */
@@ -369,7 +376,13 @@ export class KafkaConsumerManager {
 
     switch (topic) {
       case gatewayTopic:
-        this.updateGatewayInCache(data as GatewayMessage);
+        if (Array.isArray(data.gateways)) {
+          for (const gateway of (data as GatewayBatchMessage).gateways) {
+            this.updateGatewayInCache(gateway);
+          }
+        } else {
+          this.updateGatewayInCache(data as GatewayMessage);
+        }
         break;
 
       case buildingsTopic: